@@ -1,18 +1,26 @@
+import functools
 import os
 import subprocess
 import sys
+import tempfile
+from pathlib import Path
 
 sys.path.insert(0, os.path.abspath("../../src"))
 
 
+@functools.lru_cache(maxsize=1)
 def get_version():
+    # 環境変数でバージョンが指定されている場合はgitを呼び出さない
+    version = os.environ.get("QRC_DOC_VERSION")
+    if version:
+        return version
     try:
         # 最新のgit tagを取得
         tag = subprocess.check_output(
             ["git", "describe", "--tags", "--abbrev=0"], universal_newlines=True
         ).strip()
         return tag
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, OSError):
         # git tagが存在しない場合はデフォルトのバージョンを返す
         return "0.1.0"
 
@@ -35,6 +43,8 @@ language = "ja"
 # -- General configuration ---------------------------------------------------
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#general-configuration
 
+# いずれの拡張も parallel_read_safe / parallel_write_safe を宣言しているため、
+# sphinx-build -j auto による並列ビルドが有効になる（推奨: -j auto）
 extensions = [
     "sphinx.ext.autodoc",  # ソースコード読み込み用
     "sphinx.ext.napoleon",  # docstring パース用
@@ -51,3 +61,34 @@ exclude_patterns = []
 
 html_theme = "sphinx_rtd_theme"
 # -- Options for sphinx-multiversion -----------------------------------------
+
+
+# -- API documentation generation --------------------------------------------
+
+
+def _write_if_changed(path, content):
+    # 内容が変わらない場合は書き込まず、更新日時を保ってインクリメンタルビルドを有効にする
+    p = Path(path)
+    if p.exists() and p.read_bytes() == content:
+        return
+    p.write_bytes(content)
+
+
+def _generate_api_docs(app):
+    # sphinx-apidocの出力を一時ディレクトリに生成し、変更のあったファイルだけを反映する
+    from sphinx.ext import apidoc
+
+    package_dir = Path(__file__).parents[2] / "src" / "qiitareactioncounter"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        apidoc.main(["--force", "-q", "-o", tmpdir, str(package_dir)])
+        for generated in Path(tmpdir).glob("*.rst"):
+            _write_if_changed(Path(app.srcdir) / generated.name, generated.read_bytes())
+
+
+def setup(app):
+    app.connect("builder-inited", _generate_api_docs)
+    return {
+        "version": version,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,75 @@
+import os
+from datetime import date
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from qiitareactioncounter import count_reactions as count_reactions_module
+from qiitareactioncounter.count_reactions import Settings as CountSettings
+from qiitareactioncounter.run_analysis import Settings as AnalysisSettings
+
+
+@pytest.fixture(autouse=True)
+def response_cache_path(tmp_path, monkeypatch):
+    """APIレスポンスのキャッシュの保存先を一時ディレクトリに変更する"""
+    cache_path = tmp_path / "cache.sqlite"
+    monkeypatch.setattr(count_reactions_module._RESPONSE_CACHE, "path", str(cache_path))
+    return cache_path
+
+
+@pytest.fixture(scope="session")
+def qiita_token() -> str:
+    """環境変数からQiitaのアクセストークンを取得する
+
+    環境変数 QIITA_TOKEN が設定されていない場合はテストをスキップします。
+    """
+    token = os.getenv("QIITA_TOKEN")
+    if not token:
+        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
+    return token
+
+
+@pytest.fixture(scope="session")
+def headers(qiita_token: str) -> dict[str, str]:
+    """Qiita APIリクエスト用のヘッダーを作成する"""
+    return {"Authorization": f"Bearer {qiita_token}"}
+
+
+@pytest.fixture
+def date_window() -> tuple[str, str]:
+    """集計期間（開始日, 終了日）をYYYY-MM-DD形式で返す
+
+    開始日は十分に過去の日付、終了日は今日です。
+    """
+    return "2020-01-01", date.today().isoformat()
+
+
+@pytest.fixture(scope="session")
+def count_settings(qiita_token: str) -> CountSettings:
+    """集計の基本設定を作成する
+
+    設定の検証はセッションで一度だけ行い、各テストでは model_copy で必要な項目を上書きします。
+    コマンドライン引数（pytestの引数）は解析しません。
+    """
+    return CountSettings(qiita_token=qiita_token, _cli_parse_args=False)
+
+
+@pytest.fixture(scope="session")
+def analysis_settings(qiita_token: str) -> AnalysisSettings:
+    """集計・分析の基本設定を作成する
+
+    設定の検証はセッションで一度だけ行い、各テストでは model_copy で必要な項目を上書きします。
+    コマンドライン引数（pytestの引数）は解析しません。
+    """
+    return AnalysisSettings(qiita_token=qiita_token, _cli_parse_args=False)
+
+
+@pytest.fixture(scope="session")
+def qiita_session(headers: dict[str, str]):
+    """接続を使い回すQiita API用のセッションを作成する"""
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+    yield session
+    session.close()
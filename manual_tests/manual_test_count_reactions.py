@@ -1,14 +1,11 @@
 import os
-import sys
-from datetime import datetime
 from pathlib import Path
 
 import pytest
-import requests
 
 from qiitareactioncounter.count_reactions import (
-    Settings,
     collect_articles,
+    create_query,
     get_authenticated_user,
     get_user_oldest_article_date,
     run_count_reactions,
@@ -16,19 +13,14 @@ from qiitareactioncounter.count_reactions import (
 from qiitareactioncounter.schemas import ReactionCounts
 
 
-def test_run_count_reactions():
+def test_run_count_reactions(count_settings):
     """run_count_reactionsのマニュアルテスト
     実際のAPIを呼び出して、記事の取得と集計が正しく行われることを確認します。
     """
     # テスト用の設定
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
-    output_file = "test_manual_counts.csv"
-    sys.argv = ["script.py", "--output_file", output_file, "--sample_size", "100"]
-
-    settings = Settings()  # type: ignore
+    settings = count_settings.model_copy(
+        update={"output_file": "test_manual_counts.csv", "sample_size": 100}
+    )
 
     # 実行
     output_path = run_count_reactions(settings)
@@ -43,28 +35,22 @@ def test_run_count_reactions():
     assert len(counts.stocks) > 0, "ストックの集計結果が存在すること"
     assert len(counts.reactions) > 0, "リアクションの集計結果が存在すること"
 
-    # テスト用のファイルを削除
+    # テスト用のファイル（フィンガープリントファイルを含む）を削除
     Path(output_path).unlink()
+    Path(f"{output_path}.fp").unlink(missing_ok=True)
 
 
-def test_get_authenticated_user():
+def test_get_authenticated_user(headers, qiita_session):
     """get_authenticated_userのマニュアルテスト
     実際のAPIを呼び出して、認証ユーザーの情報が正しく取得できることを確認します。
 
     実行例:
         QIITA_USERID=shimajiroxyz uv run pytest manual_tests/manual_test_count_reactions.py -v -k test_get_authenticated_user
     """
-    # テスト用の設定
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
     qiita_userid = os.getenv("QIITA_USERID")
     if not qiita_userid:
         pytest.skip("環境変数 QIITA_USERID が設定されていません")
 
-    headers = {"Authorization": f"Bearer {qiita_token}"}
-
     # 認証ユーザー情報の取得
     userid = get_authenticated_user(headers)
 
@@ -73,118 +59,62 @@ def test_get_authenticated_user():
     print(f"環境変数のユーザーID: {qiita_userid}")
 
     # APIレスポンスの内容を確認
-    r = requests.get("https://qiita.com/api/v2/authenticated_user", headers=headers)
+    r = qiita_session.get("https://qiita.com/api/v2/authenticated_user")
     print(f"\nAPIレスポンス: {r.json()}")
 
     # 検証
     assert userid == qiita_userid, "取得したユーザーIDが環境変数と一致しません"
 
 
-def test_collect_articles_sample_size():
+@pytest.mark.parametrize(
+    ("userid", "sample_size"),
+    [
+        (None, 5),  # サンプルサイズが少ない場合
+        (None, 99),  # サンプルサイズが多い場合
+        ("Qiita", 10),  # 特定ユーザー（公式アカウント）を指定した場合
+    ],
+)
+def test_collect_articles_sample_size(headers, date_window, userid, sample_size):
     """collect_articles関数のサンプルサイズ適用をテストする
 
     このテストでは、collect_articles関数が指定されたサンプルサイズを正しく適用するかを
     以下のケースで検証します：
 
     1. サンプルサイズが少ない場合（5件）
-    2. サンプルサイズが多い場合（100件）
+    2. サンプルサイズが多い場合（99件）
     3. 特定ユーザーを指定した場合
 
     実行例:
         uv run pytest manual_tests/manual_test_count_reactions.py -v -k test_collect_articles_sample_size
     """
-    # テスト用の設定
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
-    headers = {"Authorization": f"Bearer {qiita_token}"}
-    end_date = datetime.now().strftime("%Y-%m-%d")
-    start_date = "2020-01-01"  # 十分に過去の日付
-
-    print("\n=== collect_articles関数のサンプルサイズテスト ===")
-
-    # 1. 少ないサンプルサイズのテスト（5件）
-    print("\n--- 少ないサンプルサイズのテスト（5件） ---")
-    small_sample_size = 5
-
-    small_articles = collect_articles(
-        start_date=start_date,
-        end_date=end_date,
-        userid=None,  # 全ユーザー
-        sample_size=small_sample_size,
-        pages_to_fetch=[1],  # 十分なページ数
-        headers=headers,
-    )
-
-    print(f"指定したサンプルサイズ: {small_sample_size}")
-    print(f"実際に取得した記事数: {len(small_articles)}")
-
-    # サンプル数の検証
-    assert len(small_articles) == small_sample_size
-
-    if len(small_articles) > 0:
-        print("\n最初の記事のタイトル:", small_articles[0].title)
-
-    # 2. 大きいサンプルサイズのテスト（100件）
-    print("\n--- 大きいサンプルサイズのテスト（100件） ---")
-    large_sample_size = 99
-
-    large_articles = collect_articles(
-        start_date=start_date,
-        end_date=end_date,
-        userid=None,  # 全ユーザー
-        sample_size=large_sample_size,
-        pages_to_fetch=[1],  # 十分なページ数
-        headers=headers,
-    )
-
-    print(f"指定したサンプルサイズ: {large_sample_size}")
-    print(f"実際に取得した記事数: {len(large_articles)}")
+    start_date, end_date = date_window
 
-    # Qiita全体からの取得のためlarge_sample_sizeだけ取得できるはず
-    assert len(large_articles) == large_sample_size
-
-    # 3. 特定ユーザーに対するテスト
-    print("\n--- 特定ユーザーに対するテスト ---")
-    user_sample_size = 10
-    test_userid = "Qiita"  # 公式アカウント
-
-    user_articles = collect_articles(
-        start_date=start_date,
-        end_date=end_date,
-        userid=test_userid,
-        sample_size=user_sample_size,
+    articles = collect_articles(
+        query=create_query(start_date, end_date, userid),
+        sample_size=sample_size,
         pages_to_fetch=[1],  # 十分なページ数
         headers=headers,
     )
 
-    print(f"指定したユーザー: {test_userid}")
-    print(f"指定したサンプルサイズ: {user_sample_size}")
-    print(f"実際に取得した記事数: {len(user_articles)}")
+    print(f"指定したユーザー: {userid or '全ユーザー'}")
+    print(f"指定したサンプルサイズ: {sample_size}")
+    print(f"実際に取得した記事数: {len(articles)}")
 
     # サンプル数の検証
-    assert len(user_articles) == user_sample_size
+    assert len(articles) == sample_size
 
 
-def test_get_user_oldest_article_date():
+def test_get_user_oldest_article_date(headers):
     """Qiitaの最も古い投稿の日付を取得するテスト
     ユーザーIDを指定した場合、最も古い投稿の日付が正しく取得できることを確認します。
 
     実行例:
         QIITA_USERID=shimajiroxyz uv run pytest manual_tests/manual_test_count_reactions.py -v -s -k test_get_user_oldest_article_date
     """
-    # 環境変数からQiitaトークンを取得
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
     # ユーザーIDを環境変数から取得
     userid = os.getenv("QIITA_USERID", "Qiita")
 
     # テスト実行
-    settings = Settings()  # type: ignore
-    headers = {"Authorization": f"Bearer {settings.qiita_token}"}
     oldest_date = get_user_oldest_article_date(headers, userid)
 
     # 結果の表示
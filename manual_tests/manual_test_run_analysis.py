@@ -1,10 +1,9 @@
 import os
-import sys
 from pathlib import Path
 
 import pytest
 
-from qiitareactioncounter.run_analysis import Settings, run_analysis
+from qiitareactioncounter.run_analysis import run_analysis
 
 
 @pytest.fixture
@@ -15,33 +14,28 @@ def test_output_dir(tmp_path):
     return str(output_dir)
 
 
-def test_run_analysis_with_userid(test_output_dir):
+def test_run_analysis_with_userid(analysis_settings, test_output_dir):
     """特定のユーザーIDを指定した場合のテスト
     全ユーザーの集計と分析、および指定したユーザーの集計と分析が実行されることを確認します。
 
     実行例:
         QIITA_USERID=Qiita uv run pytest manual_tests/manual_test_run_analysis.py -v -k test_run_analysis_with_userid
     """
-    # 環境変数からQiitaトークンを取得
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
     # ユーザーIDを環境変数から取得
     userid = os.getenv("QIITA_USERID", "Qiita")
 
-    # コマンドライン引数の設定
-    sys.argv = [
-        "script.py",
-        "--start_date=2024-01-01",
-        "--end_date=2024-01-31",
-        f"--userid={userid}",
-        f"--output_dir={test_output_dir}",
-        "--sample_size=99",
-    ]
+    # テスト用の設定
+    settings = analysis_settings.model_copy(
+        update={
+            "start_date": "2024-01-01",
+            "end_date": "2024-01-31",
+            "userid": userid,
+            "output_dir": test_output_dir,
+            "sample_size": 99,
+        }
+    )
 
     # テスト実行
-    settings = Settings()  # type: ignore
     run_analysis(settings)
 
     # 出力ディレクトリの確認
@@ -61,7 +55,7 @@ def test_run_analysis_with_userid(test_output_dir):
     assert user_analysis.exists()
 
 
-def test_run_analysis(test_output_dir):
+def test_run_analysis(analysis_settings, test_output_dir):
     """useridを指定しない場合のテスト
     全ユーザーの集計と分析、および認証ユーザーの集計と分析が実行されることを確認します。
 
@@ -69,21 +63,16 @@ def test_run_analysis(test_output_dir):
         uv run pytest manual_tests/manual_test_run_analysis.py -v -k test_run_analysis
     """
     # テスト用の設定
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
-    # コマンドライン引数の設定
-    sys.argv = [
-        "script.py",
-        "--start_date=2024-01-01",
-        "--end_date=2024-01-31",
-        f"--output_dir={test_output_dir}",
-        "--sample_size=100",
-    ]
+    settings = analysis_settings.model_copy(
+        update={
+            "start_date": "2024-01-01",
+            "end_date": "2024-01-31",
+            "output_dir": test_output_dir,
+            "sample_size": 100,
+        }
+    )
 
     # テスト実行
-    settings = Settings()  # type: ignore
     run_analysis(settings)
 
     # 出力ファイルの確認
@@ -115,31 +104,26 @@ def test_run_analysis(test_output_dir):
     )
 
 
-def test_run_analysis_with_auto_date_range(test_output_dir):
+def test_run_analysis_with_auto_date_range(analysis_settings, test_output_dir):
     """日付範囲の自動設定をテストする
     ユーザーIDを指定した場合、日付範囲が指定されていないと自動的に設定されることを確認します。
 
     実行例:
         QIITA_USERID=Qiita uv run pytest manual_tests/manual_test_run_analysis.py -v -k test_run_analysis_with_auto_date_range
     """
-    # 環境変数からQiitaトークンを取得
-    qiita_token = os.getenv("QIITA_TOKEN")
-    if not qiita_token:
-        pytest.skip("環境変数 QIITA_TOKEN が設定されていません")
-
     # ユーザーIDを環境変数から取得
     userid = os.getenv("QIITA_USERID", "Qiita")
 
-    # コマンドライン引数の設定（日付範囲を指定しない）
-    sys.argv = [
-        "script.py",
-        f"--userid={userid}",
-        f"--output_dir={test_output_dir}",
-        "--sample_size=99",
-    ]
+    # テスト用の設定（日付範囲を指定しない）
+    settings = analysis_settings.model_copy(
+        update={
+            "userid": userid,
+            "output_dir": test_output_dir,
+            "sample_size": 99,
+        }
+    )
 
     # テスト実行
-    settings = Settings()  # type: ignore
     run_analysis(settings)
 
     # 出力ディレクトリの確認
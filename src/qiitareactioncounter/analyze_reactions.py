@@ -8,6 +8,8 @@
 - n以上のリアクションがついた記事の割合の計算
 """
 
+import os
+from functools import lru_cache
 from typing import List
 
 import numpy as np
@@ -41,6 +43,67 @@ class Settings(BaseSettings):
     )
 
 
+def _order_statistics(
+    values: np.ndarray, cum: np.ndarray, ranks: np.ndarray
+) -> np.ndarray:
+    """頻度分布を展開したときの指定順位の値を取得する
+
+    Args:
+        values (np.ndarray): 昇順にソートされた値の配列
+        cum (np.ndarray): 各値までの記事数の累積和
+        ranks (np.ndarray): 取得する順位（0始まり）の配列
+
+    Returns:
+        np.ndarray: 昇順に並べたときの各順位の値
+    """
+    return values[np.searchsorted(cum, ranks, side="right")]
+
+
+def _weighted_percentile(values: np.ndarray, cum: np.ndarray, q: float) -> float:
+    """頻度分布からパーセンタイルを計算する
+
+    Args:
+        values (np.ndarray): 昇順にソートされた値の配列
+        cum (np.ndarray): 各値までの記事数の累積和
+        q (float): 分位点（0〜1）
+
+    Returns:
+        float: パーセンタイル値
+
+    Note:
+        ``np.percentile`` のデフォルト（線形補間）と同じ結果を返します。
+    """
+    total = int(cum[-1])
+    virtual_index = (total - 1) * q
+    previous_index = int(np.floor(virtual_index))
+    next_index = min(previous_index + 1, total - 1)
+    gamma = virtual_index - previous_index
+    a, b = _order_statistics(
+        values, cum, np.array([previous_index, next_index])
+    ).astype(np.float64)
+    if gamma >= 0.5:
+        return float(b - (b - a) * (1 - gamma))
+    return float(a + (b - a) * gamma)
+
+
+def _weighted_median(values: np.ndarray, cum: np.ndarray, offset: int = 0) -> float:
+    """頻度分布から中央値を計算する
+
+    Args:
+        values (np.ndarray): 昇順にソートされた値の配列
+        cum (np.ndarray): 各値までの記事数の累積和
+        offset (int): 先頭から除外する記事数。上位の記事だけの中央値を求める場合に指定する
+
+    Returns:
+        float: 中央値
+    """
+    total = int(cum[-1]) - offset
+    a, b = _order_statistics(
+        values, cum, offset + np.array([(total - 1) // 2, total // 2])
+    ).astype(np.float64)
+    return float((a + b) / 2)
+
+
 def analyze_reactions(file_path: str, n_values: List[int]) -> ReactionStats:
     """リアクション数の集計結果を分析し、統計情報を生成する
 
@@ -59,31 +122,71 @@ def analyze_reactions(file_path: str, n_values: List[int]) -> ReactionStats:
         - 上位10%の閾値、平均値、中央値
         - 各n値について、n以上のリアクションがついた記事の割合
     """
-    df = pd.read_csv(file_path)
+    st = os.stat(file_path)
+    stats = _analyze_cached(
+        os.path.abspath(file_path), st.st_mtime_ns, st.st_size, tuple(n_values)
+    )
+    # キャッシュされた結果が呼び出し側で変更されないようにコピーを返す
+    return stats.model_copy(deep=True)
 
-    # リアクション数の分布を計算
-    reactions = []
-    for _, row in df.iterrows():
-        reactions.extend([row["value"]] * row["reactions"])
-    reactions = np.array(reactions)
+
+def clear_cache() -> None:
+    """analyze_reactionsの結果キャッシュを破棄する"""
+    _analyze_cached.cache_clear()
+
+
+@lru_cache(maxsize=32)
+def _analyze_cached(
+    file_path: str, mtime_ns: int, size: int, n_values: tuple[int, ...]
+) -> ReactionStats:
+    """ファイルの更新日時とサイズをキーにして分析結果をキャッシュする
+
+    Args:
+        file_path (str): 集計結果のCSVファイルの絶対パス
+        mtime_ns (int): ファイルの更新日時（ナノ秒）
+        size (int): ファイルサイズ
+        n_values (tuple[int, ...]): n以上のリアクションがついた記事の割合を計算するn値
+
+    Returns:
+        ReactionStats: 分析結果の統計情報
+    """
+    # 必要な2列だけを整数型として読み込む
+    df = pd.read_csv(
+        file_path,
+        usecols=["value", "reactions"],
+        dtype={"value": np.int64, "reactions": np.int64},
+    )
+
+    # 頻度分布（値と記事数の組）のまま、値で一度だけソートして累積和を求める
+    order = np.argsort(df["value"].to_numpy(), kind="stable")
+    values = df["value"].to_numpy()[order]
+    counts = df["reactions"].to_numpy()[order]
+    cum = np.cumsum(counts)
+    cum_before = np.concatenate(([0], cum))
+    weighted_cum_before = np.concatenate(([0], np.cumsum(values * counts)))
 
     # 基本統計量
-    total_articles = len(reactions)
-    median = float(np.median(reactions))
-    mean = float(np.mean(reactions))
+    total_articles = int(cum[-1])
+    median = _weighted_median(values, cum)
+    mean = float(weighted_cum_before[-1] / total_articles)
 
     # 上位10%の閾値を計算
-    top_10_threshold = float(np.percentile(reactions, 90))
-    top_10_articles = reactions[reactions >= top_10_threshold]
-    top_10_mean = float(np.mean(top_10_articles))
-    top_10_median = float(np.median(top_10_articles))
+    top_10_threshold = _weighted_percentile(values, cum, 0.9)
+    # 上位10%はソート済み配列の末尾に当たるため、閾値の位置から累積和の差で求める
+    top_10_index = int(np.searchsorted(values, top_10_threshold))
+    top_10_offset = int(cum_before[top_10_index])
+    top_10_count = total_articles - top_10_offset
+    top_10_mean = float(
+        (weighted_cum_before[-1] - weighted_cum_before[top_10_index]) / top_10_count
+    )
+    top_10_median = _weighted_median(values, cum, offset=top_10_offset)
 
     # n以上の記事の割合を計算
-    n_more_or_ratio = {}
-    for n in n_values:
-        articles_with_n_or_more = np.sum(reactions > (n - 1))
-        ratio = float(articles_with_n_or_more / total_articles * 100)
-        n_more_or_ratio[n] = ratio
+    # 各n値の位置を二分探索で求め、累積和からn以上の記事数をまとめて計算する
+    n_indexes = np.searchsorted(values, np.asarray(n_values, dtype=np.int64))
+    articles_with_n_or_more = total_articles - cum_before[n_indexes]
+    ratios = articles_with_n_or_more / total_articles * 100
+    n_more_or_ratio = dict(zip(n_values, ratios.tolist()))
 
     return ReactionStats(
         total_articles=total_articles,
@@ -92,7 +195,7 @@ def analyze_reactions(file_path: str, n_values: List[int]) -> ReactionStats:
         top_10_threshold=top_10_threshold,
         top_10_mean=top_10_mean,
         top_10_median=top_10_median,
-        top_10_count=len(top_10_articles),
+        top_10_count=top_10_count,
         n_more_or_ratio=n_more_or_ratio,
     )
 
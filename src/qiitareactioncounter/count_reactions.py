@@ -9,18 +9,209 @@
 """
 
 #!/usr/bin/env python3
+import hashlib
+import json
+import os
 import random
+import sqlite3
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 
+import numpy as np
 import requests
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
 
 from qiitareactioncounter.schemas import QiitaArticle, ReactionCounts
 
 API_URL = "https://qiita.com/api/v2/items"
 
+# プロセス全体でのQiita APIへの最大同時リクエスト数（QiitaのAPIレート制限を考慮）
+MAX_WORKERS = 4
+
+# ページ取得ごとにTCP/TLS接続を張り直さないよう、接続を使い回すセッション
+# 一時的なエラー（レート制限やサーバーエラー）はバックオフしながら再試行する
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+# 複数の集計を並行して実行しても同時リクエスト数がMAX_WORKERSを超えないよう、
+# 全てのリクエストで共有する
+_REQUEST_SLOTS = threading.BoundedSemaphore(MAX_WORKERS)
+
+
+def _http_get(
+    url: str, params: dict | None = None, headers: dict[str, str] | None = None
+) -> requests.Response:
+    """同時リクエスト数を制限しながらGETリクエストを行う
+
+    Args:
+        url (str): リクエスト先のURL
+        params (dict | None): クエリパラメータ
+        headers (dict[str, str] | None): APIリクエストヘッダー
+
+    Returns:
+        requests.Response: APIのレスポンス
+    """
+    with _REQUEST_SLOTS:
+        return _SESSION.get(url, params=params, headers=headers)
+
+
+class _ResponseCache:
+    """Qiita APIのGETレスポンスをSQLiteに保存するディスクキャッシュ
+
+    Attributes:
+        path (str): キャッシュを保存するSQLiteファイルのパス
+        expire_after (int): キャッシュの有効期間（秒）
+        fields (tuple[str, ...]): レスポンスの記事から保存するフィールド
+        keep_headers (tuple[str, ...]): レスポンスから保存するヘッダー
+    """
+
+    def __init__(
+        self,
+        path: str,
+        expire_after: int,
+        fields: tuple[str, ...],
+        keep_headers: tuple[str, ...],
+    ) -> None:
+        self.path = path
+        self.expire_after = expire_after
+        self.fields = fields
+        self.keep_headers = keep_headers
+
+    @staticmethod
+    def _key(url: str, params: dict | None, headers: dict[str, str]) -> str:
+        # トークンごとに結果が変わりうるため、認証ヘッダーのハッシュもキーに含める
+        token_hash = hashlib.sha256(
+            headers.get("Authorization", "").encode()
+        ).hexdigest()
+        raw = f"{url}|{json.dumps(params, sort_keys=True)}|{token_hash}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, body BLOB, headers TEXT, ts REAL)"
+        )
+        return conn
+
+    def _load(self, key: str, now: float) -> tuple[bytes, str] | None:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT body, headers FROM responses WHERE key = ? AND ts > ?",
+                (key, now - self.expire_after),
+            ).fetchone()
+
+    def _store(self, key: str, r: requests.Response, now: float) -> None:
+        # 本文などの大きなフィールドは保存せず、使用するフィールドとヘッダーだけを残す
+        articles = [
+            {field: article[field] for field in self.fields if field in article}
+            for article in json.loads(r.content)
+        ]
+        headers = {
+            name: r.headers[name] for name in self.keep_headers if name in r.headers
+        }
+        with closing(self._connect()) as conn, conn:
+            # 有効期限が切れたレスポンスは書き込みのついでに削除する
+            conn.execute(
+                "DELETE FROM responses WHERE ts <= ?", (now - self.expire_after,)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(articles).encode(), json.dumps(headers), now),
+            )
+
+    def get(
+        self,
+        url: str,
+        params: dict | None,
+        headers: dict[str, str],
+        use_cache: bool = True,
+    ) -> requests.Response:
+        """キャッシュを参照し、なければAPIを呼び出してGETリクエストを行う
+
+        Args:
+            url (str): リクエスト先のURL
+            params (dict | None): クエリパラメータ
+            headers (dict[str, str]): APIリクエストヘッダー
+            use_cache (bool): キャッシュを使用するかどうか。Falseの場合は常にAPIを呼び出す
+
+        Returns:
+            requests.Response: APIのレスポンス（キャッシュから復元したものを含む）
+
+        Note:
+            ステータスコード200の記事一覧のレスポンスだけを、fieldsとkeep_headersに
+            絞ってキャッシュします。キャッシュファイルを読み書きできない場合は、
+            キャッシュを使わずにAPIを呼び出します。
+        """
+        if not use_cache:
+            return _http_get(url, params=params, headers=headers)
+
+        key = self._key(url, params, headers)
+        now = time.time()
+        try:
+            row = self._load(key, now)
+        except (sqlite3.Error, OSError) as e:
+            print(f"キャッシュを読み込めないため、APIを直接呼び出します: {e}")
+            return _http_get(url, params=params, headers=headers)
+        if row is not None:
+            cached = requests.Response()
+            cached.status_code = 200
+            cached._content = row[0]
+            cached.headers = CaseInsensitiveDict(json.loads(row[1]))
+            cached.encoding = "utf-8"
+            cached.url = url
+            return cached
+
+        r = _http_get(url, params=params, headers=headers)
+        if r.status_code == 200:
+            try:
+                self._store(key, r, now)
+            except (sqlite3.Error, OSError) as e:
+                print(f"キャッシュに保存できませんでした: {e}")
+        return r
+
+
+def _default_cache_path() -> str:
+    """ユーザーのキャッシュディレクトリ内のキャッシュファイルのパスを返す"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return str(Path(cache_home) / "qiitareactioncounter" / "responses.sqlite")
+
+
+# Qiita APIのレスポンスから取り出すフィールド
+_ARTICLE_FIELDS = tuple(QiitaArticle.model_fields)
+
+# 同じ条件での再実行時にAPIを呼び出さないよう、記事取得のレスポンスを1日キャッシュする
+_RESPONSE_CACHE = _ResponseCache(
+    _default_cache_path(),
+    expire_after=86400,
+    fields=_ARTICLE_FIELDS,
+    keep_headers=("Total-Count",),
+)
+
 
 class Settings(BaseSettings):
     """Qiitaのリアクション数集計の設定を管理するクラス
@@ -32,6 +223,9 @@ class Settings(BaseSettings):
         userid (str | None): 集計対象のユーザーID（オプション）
         sample_size (int): 集計する記事のサンプル数
         output_file (str): 出力ファイル名
+        force (bool): 前回と同じ条件でも集計をやり直すかどうか
+        binary_cache (bool): CSVと一緒に読み込み用のバイナリキャッシュを保存するかどうか
+        no_cache (bool): APIレスポンスのディスクキャッシュを使わないかどうか
     """
 
     qiita_token: str = Field(..., description="Qiitaのアクセストークン")
@@ -46,6 +240,18 @@ class Settings(BaseSettings):
     output_file: str = Field(
         default="counts.csv", description="出力ファイル名（デフォルトcounts.csv）"
     )
+    force: bool = Field(
+        default=False,
+        description="前回と同じ条件でも集計をやり直す（デフォルトFalse）",
+    )
+    binary_cache: bool = Field(
+        default=False,
+        description="CSVと一緒にバイナリキャッシュ（<output_file>.npy）を保存する（デフォルトFalse）",
+    )
+    no_cache: bool = Field(
+        default=False,
+        description="APIレスポンスのキャッシュを使わない（デフォルトFalse）",
+    )
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -56,8 +262,35 @@ class Settings(BaseSettings):
     )
 
 
+def _request_articles(
+    query: str,
+    page: int,
+    per_page: int,
+    headers: dict[str, str],
+    use_cache: bool = True,
+) -> requests.Response:
+    """Qiita APIの記事一覧エンドポイントにリクエストする
+
+    Args:
+        query (str): 検索クエリ
+        page (int): 取得するページ番号
+        per_page (int): 1ページあたりの記事数
+        headers (dict[str, str]): APIリクエストヘッダー
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
+
+    Returns:
+        requests.Response: APIのレスポンス
+    """
+    params = {"page": page, "per_page": per_page, "query": query}
+    return _RESPONSE_CACHE.get(API_URL, params, headers, use_cache=use_cache)
+
+
 def get_articles(
-    query: str, page: int, per_page: int, headers: dict[str, str]
+    query: str,
+    page: int,
+    per_page: int,
+    headers: dict[str, str],
+    use_cache: bool = True,
 ) -> list[QiitaArticle]:
     """Qiita APIから記事を取得する
 
@@ -66,53 +299,107 @@ def get_articles(
         page (int): 取得するページ番号
         per_page (int): 1ページあたりの記事数
         headers (dict[str, str]): APIリクエストヘッダー
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
 
     Returns:
         list[QiitaArticle]: 取得した記事のリスト
 
     Note:
         APIのレスポンスステータスが200以外の場合は空のリストを返します。
+        APIのレスポンスは信頼できるものとして、QiitaArticleの検証は行いません。
+        use_cacheがTrueの場合、取得結果はディスクにキャッシュされ、
+        有効期間内の同じリクエストはAPIを呼び出しません。
     """
-    params = {"page": page, "per_page": per_page, "query": query}
-    r: requests.Response = requests.get(API_URL, params=params, headers=headers)
+    r = _request_articles(query, page, per_page, headers, use_cache=use_cache)
     if r.status_code != 200:
         print(f"Error fetching page {page}: {r.text}")
         return []
-    return [QiitaArticle.model_validate(article) for article in r.json()]
+    # 集計に使うのはいいね数とストック数だけのため、記事ごとの検証は省略する
+    # 本文などの大きなフィールドは捨て、QiitaArticleのフィールドだけを取り出す
+    return [
+        QiitaArticle.model_construct(
+            **{field: article[field] for field in _ARTICLE_FIELDS if field in article}
+        )
+        for article in json.loads(r.content)
+    ]
 
 
-def find_valid_last_page(query: str, headers: dict[str, str]) -> int:
-    """二分探索で実際に記事が存在する最後のページを見つける
+def find_valid_last_page(
+    query: str, headers: dict[str, str], use_cache: bool = True
+) -> int:
+    """実際に記事が存在する最後のページを見つける
 
     Args:
         query (str): 検索クエリ
         headers (dict[str, str]): APIリクエストヘッダー
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
 
     Returns:
         int: 最後の有効なページ番号。記事が見つからない場合は0を返します。
 
     Note:
         Qiita APIの制限により、最大100ページまで検索します。
+        1ページ目のレスポンスのTotal-Countヘッダーから最後のページを計算し、
+        ヘッダーがない場合のみページを調べて探索します。
+    """
+    per_page = 100
+    r = _request_articles(query, 1, per_page, headers, use_cache=use_cache)
+    if r.status_code != 200:
+        print(f"Error fetching page 1: {r.text}")
+        return 0
+    if not r.json():
+        return 0
+
+    total_count = r.headers.get("total-count")
+    if total_count is not None:
+        return min(100, (int(total_count) - 1) // per_page + 1)
+    return _search_last_page(query, headers, use_cache=use_cache)
+
+
+def _search_last_page(
+    query: str, headers: dict[str, str], use_cache: bool = True
+) -> int:
+    """多分探索で実際に記事が存在する最後のページを見つける
+
+    Args:
+        query (str): 検索クエリ
+        headers (dict[str, str]): APIリクエストヘッダー
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
+
+    Returns:
+        int: 最後の有効なページ番号。記事が見つからない場合は0を返します。
+
+    Note:
+        探索範囲内のMAX_WORKERS件のページを並行して調べ、範囲を絞り込むことを繰り返します。
     """
     left = 1
     right = 100  # Qiita APIの制限（100ページ）
-    last_valid_page = 1
+    last_valid_page = 0
     per_page = 100
 
-    # まず1ページ目で記事が取得できるか確認
-    articles = get_articles(query, 1, per_page, headers)
-    if not articles:
-        return 0
-
-    while left <= right:
-        mid = (left + right) // 2
-        articles = get_articles(query, mid, per_page, headers)
+    def has_articles(page: int) -> bool:
+        return bool(get_articles(query, page, per_page, headers, use_cache=use_cache))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while left <= right:
+            # 探索範囲の両端を含む等間隔のページを並行して調べる
+            probes = sorted(
+                set(
+                    np.linspace(left, right, num=MAX_WORKERS)
+                    .round()
+                    .astype(int)
+                    .tolist()
+                )
+            )
+            results = list(executor.map(has_articles, probes))
 
-        if articles:  # 記事が存在する場合
-            last_valid_page = mid
-            left = mid + 1
-        else:  # 記事が存在しない場合
-            right = mid - 1
+            # 記事が存在する最後のページと、その次に調べたページの間に絞り込む
+            valid = [page for page, found in zip(probes, results) if found]
+            invalid = [page for page, found in zip(probes, results) if not found]
+            if valid:
+                last_valid_page = valid[-1]
+                left = last_valid_page + 1
+            right = min([page - 1 for page in invalid if page >= left], default=right)
 
     return last_valid_page
 
@@ -134,51 +421,93 @@ def create_query(start_date: str, end_date: str, userid: str | None = None) -> s
     return query
 
 
+def select_pages_to_fetch(
+    last_valid_page: int, sample_size: int, per_page: int = 100
+) -> list[int]:
+    """サンプルサイズに必要なページをランダムに選ぶ
+
+    Args:
+        last_valid_page (int): 記事が存在する最後のページ番号
+        sample_size (int): 必要な記事数
+        per_page (int): 1ページあたりの記事数
+
+    Returns:
+        list[int]: 取得するページ番号のリスト（昇順）
+
+    Note:
+        必要なページ数が記事の存在するページ数以上の場合は、全ページを返します。
+    """
+    num_pages_needed = (sample_size // per_page) + 1
+    if sample_size >= last_valid_page * per_page or num_pages_needed > last_valid_page:
+        return list(range(1, last_valid_page + 1))
+
+    rng = np.random.default_rng()
+    pages = rng.choice(
+        np.arange(1, last_valid_page + 1), size=num_pages_needed, replace=False
+    )
+    # 昇順に並べて、隣接するページをまとめて取得できるようにする
+    pages.sort()
+    return pages.tolist()
+
+
 def collect_articles(
-    start_date: str,
-    end_date: str,
-    userid: str | None,
+    query: str,
     sample_size: int,
     pages_to_fetch: list[int],
     headers: dict[str, str],
+    use_cache: bool = True,
+    label: str = "",
 ) -> list[QiitaArticle]:
     """指定されたページから記事を収集する
 
     Args:
-        start_date (str): 開始日（YYYY-MM-DD形式）
-        end_date (str): 終了日（YYYY-MM-DD形式）
-        userid (str | None): ユーザーID（オプション）
+        query (str): 検索クエリ
         sample_size (int): 必要な記事数
         pages_to_fetch (list[int]): 取得するページ番号のリスト
         headers (dict[str, str]): APIリクエストヘッダー
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
+        label (str): 進捗表示の先頭に付けるラベル。並行して実行する集計を区別するために使う
 
     Returns:
         list[QiitaArticle]: 収集した記事のリスト
 
     Note:
-        - 指定されたサンプルサイズに達した場合は、それ以降のページの取得を停止します
-        - 収集した記事数がサンプルサイズを超える場合は、ランダムにサンプリングします
+        - ページは最大MAX_WORKERS件まで並行して取得します（他の集計と合わせた上限です）
+        - 指定された全てのページを取り込みます。途中で打ち切ると特定のページ（昇順の場合は
+          古い記事）が常に除外され、サンプルが偏るためです
+        - 取得した記事はリザーバサンプリングで取り込むため、サンプルサイズを超えて保持しません
         - 記事が見つからない場合は、エラーメッセージを表示して終了します
     """
-    collected_articles = []
+    # 取得した記事から一様にsample_size件を選ぶリザーバ
+    reservoir: list[QiitaArticle] = []
+    seen = 0
     per_page = 100
-    query = create_query(start_date, end_date, userid)
-
-    for page in pages_to_fetch:
-        articles = get_articles(query, page, per_page, headers)
-        print(f"ページ {page} から {len(articles)} 件取得")
-        collected_articles.extend(articles)
-        if len(collected_articles) >= sample_size:
-            break
 
-    if len(collected_articles) == 0:
+    # ページの取得は並行して行い、結果はページの指定順に取り込む
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                get_articles, query, page, per_page, headers, use_cache=use_cache
+            )
+            for page in pages_to_fetch
+        ]
+        for page, future in zip(pages_to_fetch, futures):
+            articles = future.result()
+            print(f"{label}ページ {page} から {len(articles)} 件取得")
+            for article in articles:
+                if seen < sample_size:
+                    reservoir.append(article)
+                else:
+                    j = random.randrange(seen + 1)
+                    if j < sample_size:
+                        reservoir[j] = article
+                seen += 1
+
+    if seen == 0:
         print("記事が見つかりませんでした。期間やクエリを確認してください。")
         sys.exit(1)
 
-    if len(collected_articles) > sample_size:
-        collected_articles = random.sample(collected_articles, sample_size)
-
-    return collected_articles
+    return reservoir
 
 
 def count_reactions(articles: list[QiitaArticle]) -> ReactionCounts:
@@ -196,21 +525,7 @@ def count_reactions(articles: list[QiitaArticle]) -> ReactionCounts:
         - ストック数の頻度分布
         - 総リアクション数（いいね数 + ストック数）の頻度分布
     """
-    counts = {"likes": {}, "stocks": {}, "reactions": {}}
-
-    for article in articles:
-        like_count = article.likes_count
-        stock_count = article.stocks_count
-        reaction_count = like_count + stock_count
-
-        # 各カウントの頻度を集計
-        counts["likes"][like_count] = counts["likes"].get(like_count, 0) + 1
-        counts["stocks"][stock_count] = counts["stocks"].get(stock_count, 0) + 1
-        counts["reactions"][reaction_count] = (
-            counts["reactions"].get(reaction_count, 0) + 1
-        )
-
-    return ReactionCounts(**counts)
+    return ReactionCounts.from_articles(articles)
 
 
 def get_authenticated_user(headers: dict[str, str]) -> str:
@@ -224,8 +539,25 @@ def get_authenticated_user(headers: dict[str, str]) -> str:
 
     Raises:
         Exception: 認証に失敗した場合
+
+    Note:
+        同じヘッダーでの呼び出し結果はプロセス内でキャッシュされます。
     """
-    r: requests.Response = requests.get(
+    return _get_authenticated_user_cached(tuple(sorted(headers.items())))
+
+
+@lru_cache(maxsize=32)
+def _get_authenticated_user_cached(header_items: tuple[tuple[str, str], ...]) -> str:
+    """ヘッダーの組をキーにして認証ユーザーのIDをキャッシュする
+
+    Args:
+        header_items (tuple[tuple[str, str], ...]): ソート済みのAPIリクエストヘッダーの組
+
+    Returns:
+        str: 認証ユーザーのID
+    """
+    headers = dict(header_items)
+    r: requests.Response = _http_get(
         "https://qiita.com/api/v2/authenticated_user", headers=headers
     )
     if r.status_code != 200:
@@ -233,24 +565,50 @@ def get_authenticated_user(headers: dict[str, str]) -> str:
     return r.json()["id"]
 
 
-def get_user_oldest_article_date(headers: dict[str, str], userid: str) -> str:
+def get_user_oldest_article_date(
+    headers: dict[str, str], userid: str, use_cache: bool = True
+) -> str:
     """ユーザーの最も古い投稿の日付を取得する
 
     Args:
         headers (dict[str, str]): APIリクエストヘッダー
         userid (str): ユーザーID
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
 
     Returns:
         str: 最も古い投稿の日付（YYYY-MM-DD形式）
 
     Raises:
         Exception: ユーザーの記事を取得できない場合
+
+    Note:
+        同じヘッダーとユーザーIDでの呼び出し結果はプロセス内でキャッシュされます。
     """
-    # まず1ページ目を取得して総記事数を確認
-    params = {"page": 1, "per_page": 100}
-    r = requests.get(
-        f"https://qiita.com/api/v2/users/{userid}/items", params=params, headers=headers
+    return _get_user_oldest_article_date_cached(
+        tuple(sorted(headers.items())), userid, use_cache
     )
+
+
+@lru_cache(maxsize=32)
+def _get_user_oldest_article_date_cached(
+    header_items: tuple[tuple[str, str], ...], userid: str, use_cache: bool
+) -> str:
+    """ヘッダーの組とユーザーIDをキーにして最も古い投稿の日付をキャッシュする
+
+    Args:
+        header_items (tuple[tuple[str, str], ...]): ソート済みのAPIリクエストヘッダーの組
+        userid (str): ユーザーID
+        use_cache (bool): レスポンスのディスクキャッシュを使用するかどうか
+
+    Returns:
+        str: 最も古い投稿の日付（YYYY-MM-DD形式）
+    """
+    headers = dict(header_items)
+    url = f"https://qiita.com/api/v2/users/{userid}/items"
+
+    # まず1ページ目を取得して総記事数を確認（作成日時でソート）
+    params = {"page": 1, "per_page": 100, "sort": "created_at"}
+    r = _RESPONSE_CACHE.get(url, params, headers, use_cache=use_cache)
     if r.status_code != 200:
         raise Exception(f"ユーザーの記事を取得できませんでした: {r.text}")
 
@@ -261,13 +619,12 @@ def get_user_oldest_article_date(headers: dict[str, str], userid: str) -> str:
 
     last_page = (total_count - 1) // 100 + 1
 
-    # 最後のページから記事を取得（作成日時でソート）
-    params = {"page": last_page, "per_page": 100, "sort": "created_at"}
-    r = requests.get(
-        f"https://qiita.com/api/v2/users/{userid}/items", params=params, headers=headers
-    )
-    if r.status_code != 200:
-        raise Exception(f"ユーザーの記事を取得できませんでした: {r.text}")
+    # 記事が1ページに収まらない場合のみ、最後のページから記事を取得
+    if last_page > 1:
+        params = {"page": last_page, "per_page": 100, "sort": "created_at"}
+        r = _RESPONSE_CACHE.get(url, params, headers, use_cache=use_cache)
+        if r.status_code != 200:
+            raise Exception(f"ユーザーの記事を取得できませんでした: {r.text}")
 
     articles = r.json()
     if not articles:
@@ -281,11 +638,38 @@ def get_user_oldest_article_date(headers: dict[str, str], userid: str) -> str:
     return oldest_date.strftime("%Y-%m-%d")
 
 
-def run_count_reactions(settings: Settings | None = None, **kwargs) -> str:
+def _settings_fingerprint(settings: Settings) -> str:
+    """集計結果に影響する設定からフィンガープリントを計算する
+
+    Args:
+        settings (Settings): 集計設定
+
+    Returns:
+        str: 設定のフィンガープリント
+    """
+    payload = {
+        "start_date": settings.start_date,
+        "end_date": settings.end_date,
+        "userid": settings.userid,
+        "sample_size": settings.sample_size,
+        # トークンそのものは書き出さず、ハッシュ値だけを含める
+        "token": hashlib.sha256(settings.qiita_token.encode()).hexdigest(),
+    }
+    return hashlib.blake2b(
+        json.dumps(payload, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+
+
+def run_count_reactions(
+    settings: Settings | None = None,
+    headers: dict[str, str] | None = None,
+    **kwargs,
+) -> str:
     """リアクション数を集計し、CSVファイルに出力する
 
     Args:
         settings (Settings | None): 集計設定。Noneの場合はkwargsから設定を生成
+        headers (dict[str, str] | None): APIリクエストヘッダー。Noneの場合はトークンから生成
         **kwargs: 設定の上書き用のキーワード引数
 
     Returns:
@@ -297,59 +681,78 @@ def run_count_reactions(settings: Settings | None = None, **kwargs) -> str:
         2. 記事の取得（ランダムサンプリング）
         3. リアクション数の集計
         4. 結果のCSVファイル出力
+
+        出力ファイルと同じ条件で生成されたフィンガープリントファイル（<output_file>.fp）が
+        存在する場合は、forceが指定されない限り集計を省略して既存のファイルを返します。
     """
     # 設定の読み込み
     if settings is None:
         settings = Settings(**kwargs)
+        if "userid" in kwargs:
+            settings.userid = kwargs["userid"]
     elif kwargs:
-        # 既存の設定をkwargsで上書き
-        settings = Settings(**{**settings.model_dump(), **kwargs})
-    if "userid" in kwargs:
-        settings.userid = kwargs["userid"]
+        # 既存の設定をkwargsで上書きして検証し直す
+        # 全フィールドを明示的に渡すため、.envやコマンドライン引数は読み込まない
+        settings = Settings(
+            **{**settings.model_dump(), **kwargs},
+            _cli_parse_args=False,
+            _env_file=None,
+        )
 
     if not settings.qiita_token:
         print("エラー: 環境変数 QIITA_TOKEN が設定されていません")
         sys.exit(1)
 
-    headers = {"Authorization": f"Bearer {settings.qiita_token}"}
+    # 前回と同じ条件で集計済みであれば、APIを呼び出さずに既存の結果を使う
+    output_path = Path(settings.output_file)
+    fingerprint_path = Path(f"{settings.output_file}.fp")
+    fingerprint = _settings_fingerprint(settings)
+    if (
+        not settings.force
+        and output_path.exists()
+        and fingerprint_path.exists()
+        and fingerprint_path.read_text() == fingerprint
+    ):
+        print(f"{settings.output_file} は同じ条件で集計済みのため、集計を省略します。")
+        # バイナリキャッシュが指定されている場合は、既存のCSVから作り直す
+        if settings.binary_cache:
+            ReactionCounts.from_csv(settings.output_file).to_csv(
+                settings.output_file, binary_cache=True
+            )
+        return settings.output_file
+
+    use_cache = not settings.no_cache
+    # 全体と特定ユーザーの集計を並行して実行した場合に、どちらの出力か区別できるようにする
+    label = f"[{settings.userid or '全ユーザー'}] "
+    if headers is None:
+        headers = {"Authorization": f"Bearer {settings.qiita_token}"}
 
     query = create_query(settings.start_date, settings.end_date, settings.userid)
-    print("Query:", query)
+    print(f"{label}Query:", query)
 
     # 実際に記事が存在する最後のページを見つける
-    last_valid_page = find_valid_last_page(query, headers)
+    last_valid_page = find_valid_last_page(query, headers, use_cache=use_cache)
     if last_valid_page == 0:
-        print("指定された期間内に記事が見つかりませんでした。")
+        print(f"{label}指定された期間内に記事が見つかりませんでした。")
         sys.exit(1)
 
-    per_page = 100
-    total_possible = last_valid_page * per_page
-
-    if settings.sample_size >= total_possible:
-        pages_to_fetch = list(range(1, last_valid_page + 1))
-    else:
-        num_pages_needed = (settings.sample_size // per_page) + 1
-        if num_pages_needed > last_valid_page:
-            pages_to_fetch = list(range(1, last_valid_page + 1))
-        else:
-            pages_to_fetch = random.sample(
-                range(1, last_valid_page + 1), num_pages_needed
-            )
+    pages_to_fetch = select_pages_to_fetch(last_valid_page, settings.sample_size)
 
-    print("ランダムに選んだページ番号:", pages_to_fetch)
+    print(f"{label}ランダムに選んだページ番号:", pages_to_fetch)
 
     collected_articles = collect_articles(
-        settings.start_date,
-        settings.end_date,
-        settings.userid,
+        query,
         settings.sample_size,
         pages_to_fetch,
         headers,
+        use_cache=use_cache,
+        label=label,
     )
     counts = count_reactions(collected_articles)
-    counts.to_csv(settings.output_file)
+    counts.to_csv(settings.output_file, binary_cache=settings.binary_cache)
+    fingerprint_path.write_text(fingerprint)
 
-    print(f"{settings.output_file} を保存しました。")
+    print(f"{label}{settings.output_file} を保存しました。")
     return settings.output_file
 
 
@@ -9,7 +9,7 @@
 - 分析結果のJSONファイル出力
 """
 
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -17,6 +17,7 @@ from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from qiitareactioncounter.analyze_reactions import analyze_reactions
+from qiitareactioncounter.count_reactions import Settings as CountSettings
 from qiitareactioncounter.count_reactions import (
     get_authenticated_user,
     get_user_oldest_article_date,
@@ -35,6 +36,8 @@ class Settings(BaseSettings):
         userid (str | None): 集計対象のユーザーID（オプション）
         sample_size (int): 集計する記事のサンプル数
         output_dir (str): 出力ディレクトリのパス
+        force (bool): 前回と同じ条件でも集計をやり直すかどうか
+        no_cache (bool): APIレスポンスのディスクキャッシュを使わないかどうか
     """
 
     qiita_token: str = Field(..., description="Qiitaのアクセストークン")
@@ -52,6 +55,14 @@ class Settings(BaseSettings):
     output_dir: str = Field(
         default="results", description="出力ディレクトリ（デフォルトresults）"
     )
+    force: bool = Field(
+        default=False,
+        description="前回と同じ条件でも集計をやり直す（デフォルトFalse）",
+    )
+    no_cache: bool = Field(
+        default=False,
+        description="APIレスポンスのキャッシュを使わない（デフォルトFalse）",
+    )
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -83,8 +94,7 @@ def run_analyze_reactions(csv_path: str, output_path: str) -> ReactionStats:
     stats = analyze_reactions(csv_path, [1, 2, 3])
 
     # 分析結果をJSONファイルに保存
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(stats.model_dump(), f, ensure_ascii=False, indent=2)
+    Path(output_path).write_text(stats.model_dump_json(indent=2), encoding="utf-8")
 
     # コンソールにも出力
     print(f"\n=== {csv_path}の統計 ===")
@@ -112,63 +122,83 @@ def run_analysis(settings: Settings) -> None:
         1. 全ユーザーのリアクション数集計と分析
         2. 特定ユーザー（指定された場合）または認証ユーザーのリアクション数集計と分析
         3. 結果をCSVファイルとJSONファイルに保存
+
+        全ユーザーと特定ユーザーの集計はAPIの待ち時間が大半のため、スレッドで並行して実行します。
     """
     # 出力ディレクトリの作成
     output_path = Path(settings.output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
+    headers = {"Authorization": f"Bearer {settings.qiita_token}"}
+
     # 特定ユーザーの集計と分析（useridが指定されている場合、またはトークンがある場合は認証ユーザー）
     userid = settings.userid
     if userid is None and settings.qiita_token:
         # トークンがあり、useridが指定されていない場合は認証ユーザーの情報を取得
-        headers = {"Authorization": f"Bearer {settings.qiita_token}"}
         userid = get_authenticated_user(headers)
         print(f"\n認証ユーザーのIDを取得しました: {userid}")
 
     # 日付範囲が指定されていない場合、ユーザーの投稿履歴から取得
     start_date = settings.start_date
     if userid and start_date is None:
-        headers = {"Authorization": f"Bearer {settings.qiita_token}"}
-        start_date = get_user_oldest_article_date(headers, userid)
+        start_date = get_user_oldest_article_date(
+            headers, userid, use_cache=not settings.no_cache
+        )
         print(f"\n開始日をユーザーの最も古い投稿の日付に設定しました: {start_date}")
 
     end_date = settings.end_date
     if end_date is None:
         end_date = datetime.now().strftime("%Y-%m-%d")
 
-    # 全ユーザーの集計と分析
-    print("全ユーザーのリアクション数を集計します...")
+    # 集計の設定は一度だけ読み込み、全ユーザーと特定ユーザーの集計ではコピーして使う
     all_users_csv = output_path / "all_users_reactions.csv"
-    run_count_reactions(
-        start_date=start_date,
-        end_date=end_date,
+    user_csv = output_path / f"{userid}_reactions.csv" if userid else None
+    count_settings = CountSettings(
         qiita_token=settings.qiita_token,
-        userid=None,
+        start_date=start_date or "1900-01-01",
+        end_date=end_date,
         sample_size=settings.sample_size,
         output_file=str(all_users_csv),
+        force=settings.force,
+        no_cache=settings.no_cache,
     )
-    print(f"全ユーザーの集計結果を保存しました: {all_users_csv}")
-
-    print("\n全ユーザーの集計結果を分析します...")
-    all_users_analysis = output_path / "all_users_analysis_result.json"
-    run_analyze_reactions(str(all_users_csv), str(all_users_analysis))
-
-    if userid:
-        print(f"\n{userid}のリアクション数を集計します...")
-        user_csv = output_path / f"{userid}_reactions.csv"
-        run_count_reactions(
-            start_date=start_date or "1900-01-01",
-            end_date=end_date or "2099-12-31",
-            qiita_token=settings.qiita_token,
-            userid=userid,
-            sample_size=settings.sample_size,
-            output_file=str(user_csv),
-        )
-        print(f"{userid}の集計結果を保存しました: {user_csv}")
 
-        print(f"\n{userid}の集計結果を分析します...")
-        user_analysis = output_path / f"{userid}_analysis_result.json"
-        run_analyze_reactions(str(user_csv), str(user_analysis))
+    # 全ユーザーと特定ユーザーの集計は互いに独立しているため、並行して実行する
+    # APIへの同時リクエスト数は両方の集計を合わせてMAX_WORKERSまでに制限される
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        print("全ユーザーのリアクション数を集計します...")
+        all_users_future = executor.submit(
+            run_count_reactions,
+            count_settings,
+            headers,
+            userid=None,
+            output_file=str(all_users_csv),
+        )
+        user_future = None
+        if userid:
+            print(f"\n{userid}のリアクション数を集計します...")
+            user_future = executor.submit(
+                run_count_reactions,
+                count_settings,
+                headers,
+                userid=userid,
+                output_file=str(user_csv),
+            )
+
+        all_users_future.result()
+        print(f"全ユーザーの集計結果を保存しました: {all_users_csv}")
+
+        print("\n全ユーザーの集計結果を分析します...")
+        all_users_analysis = output_path / "all_users_analysis_result.json"
+        run_analyze_reactions(str(all_users_csv), str(all_users_analysis))
+
+        if user_future is not None:
+            user_future.result()
+            print(f"{userid}の集計結果を保存しました: {user_csv}")
+
+            print(f"\n{userid}の集計結果を分析します...")
+            user_analysis = output_path / f"{userid}_analysis_result.json"
+            run_analyze_reactions(str(user_csv), str(user_analysis))
 
 
 def main() -> None:
@@ -6,13 +6,17 @@
 - Qiita記事のデータモデル
 - リアクション数の集計結果のデータモデル
 - リアクション数の分析結果のデータモデル
-- CSVファイルとの相互変換機能
+- CSVファイルとの相互変換機能（gzip圧縮、読み込みを高速化するバイナリキャッシュ付き）
 """
 
+import gzip
+import hashlib
 from datetime import datetime
-from typing import Dict
+from pathlib import Path
 
-from pydantic import BaseModel, HttpUrl
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, HttpUrl
 from pydantic_settings import SettingsConfigDict
 
 
@@ -24,18 +28,84 @@ class QiitaArticle(BaseModel):
         likes_count (int): いいね数
         stocks_count (int): ストック数
         title (str): 記事のタイトル
-        url (HttpUrl): 記事のURL
-        created_at (datetime): 作成日時
-        updated_at (datetime): 更新日時
+        url (str): 記事のURL
+        created_at (str): 作成日時（ISO 8601形式）
+        updated_at (str): 更新日時（ISO 8601形式）
+
+    Note:
+        URLと日時は集計に使わないため、文字列のまま保持します。
+        URLとして検証する場合はurl_parsed、datetimeとして扱う場合は
+        created_at_dt、updated_at_dtを使用してください。
     """
 
     id: str
     likes_count: int
     stocks_count: int
     title: str
-    url: HttpUrl
-    created_at: datetime
-    updated_at: datetime
+    url: str
+    created_at: str
+    updated_at: str
+
+    model_config = ConfigDict(frozen=True)
+
+    @property
+    def url_parsed(self) -> HttpUrl:
+        """URLを検証してHttpUrlとして返す"""
+        return HttpUrl(self.url)
+
+    @property
+    def created_at_dt(self) -> datetime:
+        """作成日時をdatetimeとして返す"""
+        return datetime.fromisoformat(self.created_at)
+
+    @property
+    def updated_at_dt(self) -> datetime:
+        """更新日時をdatetimeとして返す"""
+        return datetime.fromisoformat(self.updated_at)
+
+
+# 集計結果を表にしたときの列名
+_COLUMNS = ["value", "likes", "stocks", "reactions"]
+
+
+def _binary_cache_path(csv_file: str) -> Path:
+    """CSVファイルに対応するバイナリキャッシュのパスを返す"""
+    return Path(f"{csv_file}.npy")
+
+
+def _file_digest(file: str) -> np.ndarray:
+    """バイナリキャッシュとCSVの照合に使う、ファイル内容のダイジェストを計算する"""
+    digest = hashlib.blake2b(Path(file).read_bytes(), digest_size=16).digest()
+    return np.frombuffer(digest, dtype=np.uint8)
+
+
+def _to_frequency_dict(values: np.ndarray, counts: np.ndarray) -> dict[int, int]:
+    """値と記事数の配列から、記事数が0より大きいものだけの頻度分布を作る"""
+    mask = counts > 0
+    return dict(zip(values[mask].tolist(), counts[mask].tolist()))
+
+
+def _frequency(values: np.ndarray) -> dict[int, int]:
+    """非負整数の配列から頻度分布を作成する
+
+    Args:
+        values (np.ndarray): 非負整数の配列
+
+    Returns:
+        dict[int, int]: 値 -> その値の出現回数（出現しない値は含まない）
+    """
+    hist = np.bincount(values)
+    nonzero = np.flatnonzero(hist)
+    return dict(zip(nonzero.tolist(), hist[nonzero].tolist()))
+
+
+def _align_frequency(frequency: dict[int, int], values: np.ndarray) -> np.ndarray:
+    """頻度分布を指定した値の並びに揃え、存在しない値は0とした配列を返す"""
+    return (
+        pd.Series(frequency, dtype=np.int64)
+        .reindex(values, fill_value=0)
+        .to_numpy(dtype=np.int64)
+    )
 
 
 class ReactionCounts(BaseModel):
@@ -47,20 +117,34 @@ class ReactionCounts(BaseModel):
     }
 
     Attributes:
-        likes (Dict[int, int]): いいね数の頻度分布
-        stocks (Dict[int, int]): ストック数の頻度分布
-        reactions (Dict[int, int]): 総リアクション数の頻度分布
+        likes (dict[int, int]): いいね数の頻度分布
+        stocks (dict[int, int]): ストック数の頻度分布
+        reactions (dict[int, int]): 総リアクション数の頻度分布
+
+    Note:
+        フィールドの再代入はできませんが、フィールドが辞書のためハッシュ化はできません。
     """
 
-    likes: Dict[int, int]  # いいね数 -> そのいいね数を持つ記事の数
-    stocks: Dict[int, int]  # ストック数 -> そのストック数を持つ記事の数
-    reactions: Dict[int, int]  # 総リアクション数 -> その総リアクション数を持つ記事の数
+    likes: dict[int, int]  # いいね数 -> そのいいね数を持つ記事の数
+    stocks: dict[int, int]  # ストック数 -> そのストック数を持つ記事の数
+    reactions: dict[int, int]  # 総リアクション数 -> その総リアクション数を持つ記事の数
+
+    model_config = ConfigDict(frozen=True)
 
-    def to_csv(self, output_file: str) -> None:
+    def to_csv(
+        self, output_file: str, binary_cache: bool = False, compress: bool = False
+    ) -> None:
         """集計結果をCSVファイルに保存する
 
         Args:
             output_file (str): 出力先のCSVファイルパス
+            binary_cache (bool): CSVと同じ内容のバイナリキャッシュ（<output_file>.npy）も
+                保存するかどうか。Falseの場合、既存のバイナリキャッシュは削除します
+            compress (bool): gzipで圧縮して保存するかどうか。
+                出力先のファイル名が.gzで終わる場合は指定しなくても圧縮します
+
+        Raises:
+            ValueError: compressを指定したのに出力先のファイル名が.gzで終わらない場合
 
         Note:
             CSVファイルは以下の列を含みます：
@@ -68,32 +152,154 @@ class ReactionCounts(BaseModel):
             - likes: そのいいね数を持つ記事の数
             - stocks: そのストック数を持つ記事の数
             - reactions: その総リアクション数を持つ記事の数
+
+            圧縮には書き込み速度を優先して最も低い圧縮レベルを使います。
+            バイナリキャッシュには、CSVのダイジェストと集計結果の表を続けて保存します。
         """
-        import csv
+        # from_csvと同じく、圧縮するかどうかはファイル名の拡張子と一致させる
+        is_gzip = str(output_file).endswith(".gz")
+        if compress and not is_gzip:
+            raise ValueError(
+                f"gzipで圧縮する場合は出力先のファイル名を.gzで終わるようにしてください: {output_file}"
+            )
+
+        table = self._to_table()
+        # 整数だけの表のため、csvモジュールのクォート処理を通さずに全体を一度に書式化する
+        lines = [",".join(_COLUMNS)]
+        lines.extend(",".join(map(str, row)) for row in table.tolist())
+        content = "\r\n".join(lines) + "\r\n"
+
+        with (
+            gzip.open(output_file, "wt", compresslevel=1, newline="")
+            if is_gzip
+            else open(output_file, "w", newline="")
+        ) as f:
+            f.write(content)
+
+        cache_path = _binary_cache_path(output_file)
+        if binary_cache:
+            # 書き込んだCSVの内容と対応づけるため、ダイジェストを先頭に保存する
+            with open(cache_path, "wb") as f:
+                np.save(f, _file_digest(output_file), allow_pickle=False)
+                np.save(f, table, allow_pickle=False)
+        else:
+            # 以前のバイナリキャッシュが残っていると古い内容を読み込んでしまうため削除する
+            cache_path.unlink(missing_ok=True)
+
+    def to_npy(self, output_file: str) -> None:
+        """集計結果をNumPyのバイナリ形式（.npy）で保存する
+
+        Args:
+            output_file (str): 出力先のファイルパス
 
+        Note:
+            value, likes, stocks, reactionsの4列からなる整数型の表として保存します。
+            テキストの解析が不要なため、CSVより高速に読み込めます。
+        """
+        with open(output_file, "wb") as f:
+            np.save(f, self._to_table(), allow_pickle=False)
+
+    @classmethod
+    def from_npy(cls, input_file: str) -> "ReactionCounts":
+        """NumPyのバイナリ形式（.npy）から集計結果を読み込む
+
+        Args:
+            input_file (str): 入力元のファイルパス
+
+        Returns:
+            ReactionCounts: 読み込んだ集計結果
+
+        Note:
+            - 0の値を持つキーは除外されます
+            - 読み込んだ値は整数型の辞書になっているため、検証は行いません
+        """
+        table = np.load(input_file, allow_pickle=False)
+        return cls.from_arrays(*table.T)
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """集計結果を値の昇順に揃えた列ごとの配列にする
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+                value, likes, stocks, reactionsの整数型の配列。
+                likes, stocks, reactionsはvalueの各値を持つ記事の数で、存在しない値は0になります。
+        """
         # 全てのカウント値を取得してソート
         all_values = sorted(
-            set(
-                list(self.likes.keys())
-                + list(self.stocks.keys())
-                + list(self.reactions.keys())
-            )
+            self.likes.keys() | self.stocks.keys() | self.reactions.keys()
+        )
+
+        # 頻度の集計結果を全てのカウント値に揃える
+        values = np.fromiter(all_values, dtype=np.int64, count=len(all_values))
+        return (
+            values,
+            _align_frequency(self.likes, values),
+            _align_frequency(self.stocks, values),
+            _align_frequency(self.reactions, values),
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        values: np.ndarray,
+        likes: np.ndarray,
+        stocks: np.ndarray,
+        reactions: np.ndarray,
+    ) -> "ReactionCounts":
+        """列ごとの配列から集計結果を作成する
+
+        Args:
+            values (np.ndarray): リアクション数の配列
+            likes (np.ndarray): valueの各値のいいね数を持つ記事の数
+            stocks (np.ndarray): valueの各値のストック数を持つ記事の数
+            reactions (np.ndarray): valueの各値の総リアクション数を持つ記事の数
+
+        Returns:
+            ReactionCounts: 作成した集計結果
+
+        Note:
+            - 0の値を持つキーは除外されます
+            - 配列は整数型の辞書に変換されるため、検証は行いません
+        """
+        return cls.model_construct(
+            likes=_to_frequency_dict(values, likes),
+            stocks=_to_frequency_dict(values, stocks),
+            reactions=_to_frequency_dict(values, reactions),
+        )
+
+    @classmethod
+    def from_articles(cls, articles: list[QiitaArticle]) -> "ReactionCounts":
+        """記事のリストからリアクションを集計する
+
+        Args:
+            articles (list[QiitaArticle]): 集計対象の記事リスト
+
+        Returns:
+            ReactionCounts: 集計結果
+
+        Note:
+            いいね数、ストック数、総リアクション数（いいね数 + ストック数）の頻度分布を
+            np.bincountでまとめて集計します。
+        """
+        # 記事の走査は一度だけ行い、いいね数とストック数を2列の配列として取り出す
+        table = np.fromiter(
+            ((article.likes_count, article.stocks_count) for article in articles),
+            dtype=(np.int64, 2),
+            count=len(articles),
+        )
+        likes = table[:, 0]
+        stocks = table[:, 1]
+
+        # 集計結果は整数型の辞書になっているため、検証は行わない
+        return cls.model_construct(
+            likes=_frequency(likes),
+            stocks=_frequency(stocks),
+            reactions=_frequency(likes + stocks),
         )
 
-        # 頻度の集計
-        with open(output_file, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["value", "likes", "stocks", "reactions"])
-
-            for value in all_values:
-                writer.writerow(
-                    [
-                        value,
-                        self.likes.get(value, 0),
-                        self.stocks.get(value, 0),
-                        self.reactions.get(value, 0),
-                    ]
-                )
+    def _to_table(self) -> np.ndarray:
+        """集計結果をvalue, likes, stocks, reactionsの4列からなる整数型の表にする"""
+        return np.column_stack(self.to_arrays())
 
     @classmethod
     def from_csv(cls, input_file: str) -> "ReactionCounts":
@@ -107,35 +313,29 @@ class ReactionCounts(BaseModel):
 
         Note:
             - 0の値を持つキーは除外されます
+            - 読み込んだ値は整数型の辞書になっているため、検証は行いません
+            - CSVの内容と一致するバイナリキャッシュ（<input_file>.npy）がある場合は
+              そちらを読み込みます
+            - ファイル名が.gzで終わる場合はgzipで圧縮されたCSVとして読み込みます
             - CSVファイルは以下の列を含む必要があります：
               - value: リアクション数
               - likes: そのいいね数を持つ記事の数
               - stocks: そのストック数を持つ記事の数
               - reactions: その総リアクション数を持つ記事の数
         """
-        import csv
-
-        likes: Dict[int, int] = {}
-        stocks: Dict[int, int] = {}
-        reactions: Dict[int, int] = {}
-
-        with open(input_file, "r") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                value = int(row["value"])
-                likes_value = int(row["likes"])
-                stocks_value = int(row["stocks"])
-                reactions_value = int(row["reactions"])
-
-                # 0の値を持つキーは除外
-                if likes_value > 0:
-                    likes[value] = likes_value
-                if stocks_value > 0:
-                    stocks[value] = stocks_value
-                if reactions_value > 0:
-                    reactions[value] = reactions_value
-
-        return cls(likes=likes, stocks=stocks, reactions=reactions)
+        # 更新日時はコピーやチェックアウトで前後するため、CSVのダイジェストで照合する
+        cache_path = _binary_cache_path(input_file)
+        if cache_path.exists():
+            with open(cache_path, "rb") as f:
+                digest = np.load(f, allow_pickle=False)
+                if np.array_equal(digest, _file_digest(input_file)):
+                    table = np.load(f, allow_pickle=False)
+                    return cls.from_arrays(*table.T)
+
+        # 全列を整数型として一度に読み込み、列ごとに0より大きい値だけを辞書にする
+        # 圧縮形式はファイル名の拡張子から判定する
+        df = pd.read_csv(input_file, dtype=np.int64, compression="infer")
+        return cls.from_arrays(*(df[column].to_numpy() for column in _COLUMNS))
 
 
 class ReactionStats(BaseModel):
@@ -2,23 +2,23 @@ import os
 import tempfile
 
 import pandas as pd
+import pytest
 
-from qiitareactioncounter.analyze_reactions import analyze_reactions
+from qiitareactioncounter.analyze_reactions import analyze_reactions, clear_cache
 
 
-def test_analyze_reactions_basic_stats():
-    # テスト用のデータを作成
+@pytest.fixture(scope="module")
+def uniform_csv(tmp_path_factory) -> str:
+    """値1〜5の記事が1件ずつあるCSVファイルを作成（モジュール内で共有）"""
     data = {"value": [1, 2, 3, 4, 5], "reactions": [1, 1, 1, 1, 1]}
-    df = pd.DataFrame(data)
+    path = tmp_path_factory.mktemp("analyze_reactions") / "uniform.csv"
+    pd.DataFrame(data).to_csv(path, index=False)
+    return str(path)
 
-    # 一時的なCSVファイルを作成
-    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
-        df.to_csv(f.name, index=False)
-        # 分析を実行
-        stats = analyze_reactions(f.name, n_values=[1, 2, 3])
 
-    # 一時ファイルを削除
-    os.unlink(f.name)
+def test_analyze_reactions_basic_stats(uniform_csv):
+    # 分析を実行
+    stats = analyze_reactions(uniform_csv, n_values=[1, 2, 3])
 
     # 基本統計量の検証
     assert stats.total_articles == 5
@@ -26,22 +26,17 @@ def test_analyze_reactions_basic_stats():
     assert stats.mean == 3.0
 
 
-def test_analyze_reactions_top_10():
+def test_analyze_reactions_top_10(tmp_path):
     # テスト用のデータを作成
     data = {
         "value": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
         "reactions": [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
     }
-    df = pd.DataFrame(data)
-
-    # 一時的なCSVファイルを作成
-    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
-        df.to_csv(f.name, index=False)
-        # 分析を実行
-        stats = analyze_reactions(f.name, n_values=[1, 2, 3])
+    csv_path = tmp_path / "top_10.csv"
+    pd.DataFrame(data).to_csv(csv_path, index=False)
 
-    # 一時ファイルを削除
-    os.unlink(f.name)
+    # 分析を実行
+    stats = analyze_reactions(str(csv_path), n_values=[1, 2, 3])
 
     # 上位10%の検証
     assert stats.top_10_threshold == 9.1
@@ -50,27 +45,22 @@ def test_analyze_reactions_top_10():
     assert stats.top_10_median == 10.0
 
 
-def test_analyze_reactions_ratios():
-    # テスト用のデータを作成
-    data = {"value": [1, 2, 3, 4, 5], "reactions": [1, 1, 1, 1, 1]}
-    df = pd.DataFrame(data)
-
-    # 一時的なCSVファイルを作成
-    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
-        df.to_csv(f.name, index=False)
-        # 分析を実行
-        stats = analyze_reactions(f.name, n_values=[1, 2, 3])
-
-    # 一時ファイルを削除
-    os.unlink(f.name)
+@pytest.mark.parametrize(
+    ("n_values", "expected"),
+    [
+        ([1, 2, 3], {1: 100.0, 2: 80.0, 3: 60.0}),  # デフォルトのn値
+        ([2, 4, 5], {2: 80.0, 4: 40.0, 5: 20.0}),  # 任意のn値
+    ],
+)
+def test_analyze_reactions_ratios(uniform_csv, n_values, expected):
+    # 分析を実行
+    stats = analyze_reactions(uniform_csv, n_values=n_values)
 
     # 割合の検証
-    assert stats.n_more_or_ratio[1] == 100.0
-    assert stats.n_more_or_ratio[2] == 80.0
-    assert stats.n_more_or_ratio[3] == 60.0
+    assert stats.n_more_or_ratio == expected
 
 
-def test_analyze_reactions_custom_n_values():
+def test_analyze_reactions_cache_invalidated_on_update():
     # テスト用のデータを作成
     data = {"value": [1, 2, 3, 4, 5], "reactions": [1, 1, 1, 1, 1]}
     df = pd.DataFrame(data)
@@ -78,13 +68,18 @@ def test_analyze_reactions_custom_n_values():
     # 一時的なCSVファイルを作成
     with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
         df.to_csv(f.name, index=False)
-        # 分析を実行
-        stats = analyze_reactions(f.name, n_values=[2, 4, 5])
+        clear_cache()
+        stats = analyze_reactions(f.name, n_values=[1, 2, 3])
+
+        # 同じファイルを別の内容で上書きして再度分析を実行
+        data = {"value": [10, 20, 30], "reactions": [2, 2, 2]}
+        pd.DataFrame(data).to_csv(f.name, index=False)
+        updated_stats = analyze_reactions(f.name, n_values=[1, 2, 3])
 
     # 一時ファイルを削除
     os.unlink(f.name)
 
-    # 割合の検証
-    assert stats.n_more_or_ratio[2] == 80.0
-    assert stats.n_more_or_ratio[4] == 40.0
-    assert stats.n_more_or_ratio[5] == 20.0
+    # ファイルの更新が反映されていることを検証
+    assert stats.total_articles == 5
+    assert updated_stats.total_articles == 6
+    assert updated_stats.median == 20.0
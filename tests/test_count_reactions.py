@@ -1,13 +1,26 @@
+import json
+import sqlite3
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from unittest.mock import patch
 
 import pytest
+import requests
 
+from qiitareactioncounter import count_reactions as count_reactions_module
 from qiitareactioncounter.count_reactions import (
     Settings,
     collect_articles,
     count_reactions,
     create_query,
+    find_valid_last_page,
+    get_articles,
+    get_user_oldest_article_date,
+    run_count_reactions,
+    select_pages_to_fetch,
 )
 from qiitareactioncounter.schemas import QiitaArticle
 
@@ -21,6 +34,14 @@ def setup_sys_argv():
     sys.argv = original_argv
 
 
+@pytest.fixture(autouse=True)
+def response_cache_path(tmp_path, monkeypatch):
+    """APIレスポンスのキャッシュの保存先を一時ディレクトリに変更する"""
+    cache_path = tmp_path / "cache.sqlite"
+    monkeypatch.setattr(count_reactions_module._RESPONSE_CACHE, "path", str(cache_path))
+    return cache_path
+
+
 @pytest.fixture
 def settings():
     return Settings(
@@ -45,11 +66,25 @@ def test_create_query_without_userid():
     assert query == expected
 
 
+def test_select_pages_to_fetch():
+    pages = select_pages_to_fetch(last_valid_page=100, sample_size=250)
+
+    # 必要なページ数が重複なく昇順で選ばれること
+    assert len(pages) == 3
+    assert pages == sorted(set(pages))
+    assert all(1 <= page <= 100 for page in pages)
+
+
+def test_select_pages_to_fetch_all_pages():
+    # 全ページを取得しても足りない場合は全ページを返す
+    assert select_pages_to_fetch(last_valid_page=3, sample_size=1000) == [1, 2, 3]
+
+
 @patch("qiitareactioncounter.count_reactions.get_articles")
 def test_collect_articles(mock_get_articles, settings):
     # モックの設定
-    mock_get_articles.side_effect = [
-        [
+    pages = {
+        1: [
             QiitaArticle.model_validate(
                 {
                     "id": "1",
@@ -62,7 +97,7 @@ def test_collect_articles(mock_get_articles, settings):
                 }
             )
         ],  # ページ1の記事
-        [
+        2: [
             QiitaArticle.model_validate(
                 {
                     "id": "2",
@@ -75,13 +110,15 @@ def test_collect_articles(mock_get_articles, settings):
                 }
             )
         ],  # ページ2の記事
-    ]
+    }
+    # ページは並行して取得されるため、呼び出し順ではなくページ番号で結果を返す
+    mock_get_articles.side_effect = lambda query, page, per_page, headers, **kwargs: (
+        pages[page]
+    )
 
     # テスト実行
     articles = collect_articles(
-        start_date=settings.start_date,
-        end_date=settings.end_date,
-        userid=settings.userid,
+        query=create_query(settings.start_date, settings.end_date, settings.userid),
         sample_size=settings.sample_size,
         pages_to_fetch=[1, 2],
         headers={"Authorization": "Bearer test_token"},
@@ -95,6 +132,63 @@ def test_collect_articles(mock_get_articles, settings):
     assert mock_get_articles.call_count == 2
 
 
+@patch("qiitareactioncounter.count_reactions.get_articles")
+def test_collect_articles_samples_to_sample_size(mock_get_articles):
+    # 1ページに3件ずつ記事がある場合
+    pages = {
+        page: [
+            QiitaArticle.model_construct(
+                id=f"{page}-{i}", likes_count=i, stocks_count=0
+            )
+            for i in range(3)
+        ]
+        for page in (1, 2)
+    }
+    mock_get_articles.side_effect = lambda query, page, per_page, headers, **kwargs: (
+        pages[page]
+    )
+
+    articles = collect_articles(
+        query=create_query("2024-01-01", "2024-01-31"),
+        sample_size=4,
+        pages_to_fetch=[1, 2],
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    # サンプルサイズ分だけ重複なく選ばれること
+    assert len(articles) == 4
+    assert len({a.id for a in articles}) == 4
+
+
+@patch("qiitareactioncounter.count_reactions.get_articles")
+def test_collect_articles_samples_from_all_pages(mock_get_articles):
+    # サンプルサイズがページあたりの記事数の倍数で、途中のページで必要数に達する場合
+    pages = {
+        page: [
+            QiitaArticle.model_construct(
+                id=f"{page}-{i}", likes_count=page, stocks_count=0
+            )
+            for i in range(100)
+        ]
+        for page in (1, 2, 3)
+    }
+    mock_get_articles.side_effect = lambda query, page, per_page, headers, **kwargs: (
+        pages[page]
+    )
+
+    articles = collect_articles(
+        query=create_query("2024-01-01", "2024-01-31"),
+        sample_size=200,
+        pages_to_fetch=[1, 2, 3],
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    # 最後のページも取得され、サンプルが全てのページにまたがること
+    assert mock_get_articles.call_count == 3
+    assert len(articles) == 200
+    assert {a.likes_count for a in articles} == {1, 2, 3}
+
+
 def test_count_reactions():
     articles = [
         QiitaArticle.model_validate(
@@ -137,3 +231,225 @@ def test_count_reactions():
     assert counts.likes == {10: 2, 20: 1}
     assert counts.stocks == {5: 2, 10: 1}
     assert counts.reactions == {15: 2, 30: 1}
+
+
+@patch("qiitareactioncounter.count_reactions.collect_articles")
+@patch("qiitareactioncounter.count_reactions.find_valid_last_page")
+def test_run_count_reactions_skips_when_unchanged(
+    mock_find_valid_last_page, mock_collect_articles, settings, tmp_path
+):
+    # モックの設定
+    mock_find_valid_last_page.return_value = 1
+    mock_collect_articles.return_value = [
+        QiitaArticle.model_validate(
+            {
+                "id": "1",
+                "likes_count": 10,
+                "stocks_count": 5,
+                "title": "Test Article 1",
+                "url": "https://qiita.com/articles/1",
+                "created_at": "2024-01-01T00:00:00+09:00",
+                "updated_at": "2024-01-01T00:00:00+09:00",
+            }
+        )
+    ]
+    output_file = str(tmp_path / "counts.csv")
+
+    # 同じ条件で2回実行すると、2回目は集計が省略される
+    run_count_reactions(settings, output_file=output_file)
+    run_count_reactions(settings, output_file=output_file)
+    assert mock_collect_articles.call_count == 1
+
+    # 条件が変わった場合は集計し直す
+    run_count_reactions(settings, output_file=output_file, sample_size=50)
+    assert mock_collect_articles.call_count == 2
+
+    # forceを指定した場合は同じ条件でも集計し直す
+    run_count_reactions(settings, output_file=output_file, sample_size=50, force=True)
+    assert mock_collect_articles.call_count == 3
+
+    # 集計を省略する場合でも、指定されたバイナリキャッシュは作成される
+    run_count_reactions(
+        settings, output_file=output_file, sample_size=50, binary_cache=True
+    )
+    assert mock_collect_articles.call_count == 3
+    assert (tmp_path / "counts.csv.npy").exists()
+
+
+def test_get_articles_uses_response_cache():
+    # APIレスポンスのモックを作成
+    response = requests.Response()
+    response.status_code = 200
+    response._content = (
+        b'[{"id": "1", "likes_count": 10, "stocks_count": 5,'
+        b' "title": "Test Article 1", "url": "https://qiita.com/articles/1",'
+        b' "created_at": "2024-01-01T00:00:00+09:00",'
+        b' "updated_at": "2024-01-01T00:00:00+09:00"}]'
+    )
+    headers = {"Authorization": "Bearer test_token"}
+
+    with patch.object(
+        count_reactions_module._SESSION, "get", return_value=response
+    ) as mock_get:
+        first = get_articles("query", 1, 100, headers)
+        second = get_articles("query", 1, 100, headers)
+
+        # 2回目はキャッシュから取得され、APIは1回しか呼び出されない
+        assert mock_get.call_count == 1
+        assert [a.id for a in first] == [a.id for a in second] == ["1"]
+
+        # キャッシュを使わない場合は、キャッシュがあってもAPIを呼び出す
+        get_articles("query", 1, 100, headers, use_cache=False)
+        assert mock_get.call_count == 2
+
+
+def test_response_cache_stores_projected_response(response_cache_path):
+    # 本文と不要なヘッダーを含むAPIレスポンスのモックを作成
+    response = requests.Response()
+    response.status_code = 200
+    response._content = (
+        b'[{"id": "1", "likes_count": 10, "stocks_count": 5, "body": "long body"}]'
+    )
+    response.headers["Total-Count"] = "1"
+    response.headers["Set-Cookie"] = "secret"
+    cache = count_reactions_module._RESPONSE_CACHE
+
+    # 有効期限が切れたレスポンスを事前に保存しておく
+    with closing(cache._connect()) as conn, conn:
+        conn.execute(
+            "INSERT INTO responses VALUES ('expired', x'5b5d', '{}', 0)",
+        )
+
+    with patch.object(count_reactions_module._SESSION, "get", return_value=response):
+        cache.get("https://example.com", {"page": 1}, {})
+    cached = cache.get("https://example.com", {"page": 1}, {})
+
+    # 使用するフィールドとヘッダーだけが保存され、期限切れのレスポンスは削除される
+    assert json.loads(cached.content) == [
+        {"id": "1", "likes_count": 10, "stocks_count": 5}
+    ]
+    assert dict(cached.headers) == {"Total-Count": "1"}
+    with closing(sqlite3.connect(response_cache_path)) as conn:
+        keys = [row[0] for row in conn.execute("SELECT key FROM responses")]
+    assert "expired" not in keys
+    assert len(keys) == 1
+
+
+def test_response_cache_falls_back_on_sqlite_error(tmp_path, monkeypatch):
+    # キャッシュファイルとして開けない場所（ディレクトリ）を指定する
+    monkeypatch.setattr(count_reactions_module._RESPONSE_CACHE, "path", str(tmp_path))
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"[]"
+
+    with patch.object(
+        count_reactions_module._SESSION, "get", return_value=response
+    ) as mock_get:
+        articles = get_articles("query", 1, 100, {})
+
+    # キャッシュを使えなくても、APIから取得した結果が返される
+    assert articles == []
+    assert mock_get.call_count == 1
+
+
+def test_find_valid_last_page_from_total_count():
+    # 1ページ目のレスポンスにTotal-Countヘッダーが含まれる場合
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'[{"id": "1"}]'
+    response.headers["Total-Count"] = "250"
+
+    with patch.object(
+        count_reactions_module._RESPONSE_CACHE, "get", return_value=response
+    ) as mock_get:
+        last_page = find_valid_last_page("query", {})
+
+    # 1回のリクエストで最後のページが計算されること
+    assert last_page == 3
+    assert mock_get.call_count == 1
+
+
+@pytest.mark.parametrize("last_page", [0, 1, 37, 100])
+@patch("qiitareactioncounter.count_reactions.get_articles")
+def test_search_last_page(mock_get_articles, last_page):
+    # last_pageまでのページにだけ記事がある場合
+    article = QiitaArticle.model_construct(id="1", likes_count=0, stocks_count=0)
+    mock_get_articles.side_effect = lambda query, page, per_page, headers, **kwargs: (
+        [article] if page <= last_page else []
+    )
+
+    # Total-Countヘッダーがない場合の探索で最後のページが見つかること
+    assert count_reactions_module._search_last_page("query", {}) == last_page
+
+
+def test_get_user_oldest_article_date_single_page():
+    # 記事が1ページに収まるユーザーの場合
+    response = requests.Response()
+    response.status_code = 200
+    response._content = (
+        b'[{"created_at": "2024-03-01T00:00:00+09:00"},'
+        b' {"created_at": "2021-05-02T00:00:00+09:00"}]'
+    )
+    response.headers["Total-Count"] = "2"
+
+    with patch.object(
+        count_reactions_module._RESPONSE_CACHE, "get", return_value=response
+    ) as mock_get:
+        oldest_date = get_user_oldest_article_date({}, "test_user")
+
+    # 1ページ目のレスポンスだけで最も古い投稿の日付が得られること
+    assert oldest_date == "2021-05-02"
+    assert mock_get.call_count == 1
+
+
+@patch("qiitareactioncounter.count_reactions.collect_articles")
+@patch("qiitareactioncounter.count_reactions.find_valid_last_page")
+def test_run_count_reactions_validates_overrides(
+    mock_find_valid_last_page, mock_collect_articles, settings, tmp_path
+):
+    # モックの設定
+    mock_find_valid_last_page.return_value = 10
+    mock_collect_articles.return_value = [
+        QiitaArticle.model_construct(id="1", likes_count=10, stocks_count=5)
+    ]
+
+    # 上書きする値は設定と同じ型に変換されること
+    run_count_reactions(
+        settings, output_file=str(tmp_path / "counts.csv"), sample_size="150"
+    )
+    assert mock_collect_articles.call_args.args[1] == 150
+
+
+def test_requests_share_concurrency_limit():
+    # 同時に処理中のリクエスト数を記録するAPIのモックを作成
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def slow_get(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[]"
+        return response
+
+    # 2つの集計がそれぞれMAX_WORKERS件ずつ並行して取得する場合
+    with patch.object(count_reactions_module._SESSION, "get", side_effect=slow_get):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    count_reactions_module._search_last_page, query, {}, False
+                )
+                for query in ["user:a", "user:b"]
+            ]
+            for future in futures:
+                future.result()
+
+    # 合計の同時リクエスト数がMAX_WORKERSを超えないこと
+    assert 1 < max_in_flight <= count_reactions_module.MAX_WORKERS
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+import pandas as pd
+
+from qiitareactioncounter.run_analysis import run_analyze_reactions
+from qiitareactioncounter.schemas import ReactionStats
+
+
+def test_run_analyze_reactions_json_output(tmp_path):
+    # テスト用のデータを作成
+    data = {"value": [1, 2, 3, 4, 5], "reactions": [1, 1, 1, 1, 1]}
+    csv_path = tmp_path / "uniform.csv"
+    pd.DataFrame(data).to_csv(csv_path, index=False)
+    output_path = tmp_path / "stats.json"
+
+    run_analyze_reactions(str(csv_path), str(output_path))
+
+    # 出力されるJSONの書式を固定する
+    assert output_path.read_text(encoding="utf-8") == (
+        "{\n"
+        '  "total_articles": 5,\n'
+        '  "median": 3.0,\n'
+        '  "mean": 3.0,\n'
+        '  "top_10_threshold": 4.6,\n'
+        '  "top_10_mean": 5.0,\n'
+        '  "top_10_median": 5.0,\n'
+        '  "top_10_count": 1,\n'
+        '  "n_more_or_ratio": {\n'
+        '    "1": 100.0,\n'
+        '    "2": 80.0,\n'
+        '    "3": 60.0\n'
+        "  }\n"
+        "}"
+    )
+
+
+def test_run_analyze_reactions_json_non_finite(tmp_path):
+    # 指数表記になる小さな値と、有限でない値を含む分析結果
+    stats = ReactionStats(
+        total_articles=0,
+        median=float("nan"),
+        mean=1e-05,
+        top_10_threshold=float("inf"),
+        top_10_mean=0.0,
+        top_10_median=0.0,
+        top_10_count=0,
+        n_more_or_ratio={1: 1 / 3},
+    )
+    output_path = tmp_path / "stats.json"
+
+    with patch(
+        "qiitareactioncounter.run_analysis.analyze_reactions", return_value=stats
+    ):
+        run_analyze_reactions("unused.csv", str(output_path))
+
+    # 小さな値は指数表記にならず、inf・nanは標準のJSONで表せるnullとして出力される
+    content = output_path.read_text(encoding="utf-8")
+    assert '"mean": 0.00001,' in content
+    assert '"median": null,' in content
+    assert '"top_10_threshold": null,' in content
+    assert '"1": 0.3333333333333333' in content
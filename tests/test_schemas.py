@@ -1,11 +1,12 @@
 import csv
 import os
 import tempfile
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
 
-from qiitareactioncounter.schemas import ReactionCounts
+from qiitareactioncounter.schemas import QiitaArticle, ReactionCounts
 
 
 @pytest.fixture
@@ -86,3 +87,136 @@ def test_from_csv_empty_file(temp_csv_file: Path) -> None:
     assert counts.likes == {}
     assert counts.stocks == {}
     assert counts.reactions == {}
+
+
+def test_binary_cache_roundtrip(
+    sample_counts: ReactionCounts, temp_csv_file: Path
+) -> None:
+    """バイナリキャッシュを使った出力と読み込みをテスト"""
+    # バイナリキャッシュ付きで出力
+    sample_counts.to_csv(str(temp_csv_file), binary_cache=True)
+    cache_file = Path(f"{temp_csv_file}.npy")
+    assert cache_file.exists()
+
+    # キャッシュから読み込んだ結果が元のデータと一致することを確認
+    loaded_counts = ReactionCounts.from_csv(str(temp_csv_file))
+    assert loaded_counts == sample_counts
+
+    # テスト用のファイルを削除
+    cache_file.unlink()
+
+
+def test_stale_binary_cache_is_ignored(
+    sample_counts: ReactionCounts, temp_csv_file: Path
+) -> None:
+    """CSVと内容が一致しないバイナリキャッシュが使われないことをテスト"""
+    cache_file = Path(f"{temp_csv_file}.npy")
+    new_counts = ReactionCounts(likes={7: 1}, stocks={0: 1}, reactions={7: 1})
+
+    # バイナリキャッシュなしで出力し直すと、以前のキャッシュは削除される
+    sample_counts.to_csv(str(temp_csv_file), binary_cache=True)
+    new_counts.to_csv(str(temp_csv_file))
+    assert not cache_file.exists()
+    assert ReactionCounts.from_csv(str(temp_csv_file)) == new_counts
+
+    # コピーなどで古いキャッシュの方が新しい更新日時になっても、内容が違えば使わない
+    sample_counts.to_csv(str(temp_csv_file), binary_cache=True)
+    stale_cache = cache_file.read_bytes()
+    new_counts.to_csv(str(temp_csv_file))
+    cache_file.write_bytes(stale_cache)
+    csv_mtime_ns = temp_csv_file.stat().st_mtime_ns
+    os.utime(cache_file, ns=(csv_mtime_ns + 10**9, csv_mtime_ns + 10**9))
+    assert ReactionCounts.from_csv(str(temp_csv_file)) == new_counts
+
+    # テスト用のファイルを削除
+    cache_file.unlink()
+    temp_csv_file.unlink()
+
+
+def test_npy_roundtrip(sample_counts: ReactionCounts, tmp_path: Path) -> None:
+    """NumPyのバイナリ形式での出力と読み込みをテスト"""
+    npy_file = tmp_path / "counts.npy"
+    sample_counts.to_npy(str(npy_file))
+
+    # 読み込んだ結果が元のデータと一致することを確認
+    assert ReactionCounts.from_npy(str(npy_file)) == sample_counts
+
+
+def test_arrays_roundtrip(sample_counts: ReactionCounts) -> None:
+    """列ごとの配列への変換と復元をテスト"""
+    values, likes, stocks, reactions = sample_counts.to_arrays()
+
+    # 値の昇順に揃い、存在しない値は0で埋められることを確認
+    assert values.tolist() == [1, 2, 3]
+    assert likes.tolist() == [10, 5, 2]
+    assert stocks.tolist() == [8, 3, 0]
+    assert reactions.tolist() == [12, 6, 4]
+
+    assert ReactionCounts.from_arrays(values, likes, stocks, reactions) == sample_counts
+
+
+def test_qiita_article_lazy_properties() -> None:
+    """URL・作成日時・更新日時が必要なときに変換できることをテスト"""
+    article = QiitaArticle.model_validate(
+        {
+            "id": "1",
+            "likes_count": 10,
+            "stocks_count": 5,
+            "title": "Test Article 1",
+            "url": "https://qiita.com/articles/1",
+            "created_at": "2024-01-01T00:00:00+09:00",
+            "updated_at": "2024-01-02T12:30:00+09:00",
+        }
+    )
+
+    # 文字列のまま保持され、必要なときにdatetimeに変換されることを確認
+    jst = timezone(timedelta(hours=9))
+    assert article.created_at == "2024-01-01T00:00:00+09:00"
+    assert article.created_at_dt == datetime(2024, 1, 1, tzinfo=jst)
+    assert article.updated_at_dt == datetime(2024, 1, 2, 12, 30, tzinfo=jst)
+
+    # URLも文字列のまま保持され、必要なときに検証できることを確認
+    assert article.url == "https://qiita.com/articles/1"
+    assert article.url_parsed.host == "qiita.com"
+
+
+def test_compressed_csv_roundtrip(
+    sample_counts: ReactionCounts, tmp_path: Path
+) -> None:
+    """gzip圧縮したCSVファイルの出力と読み込みをテスト"""
+    csv_file = tmp_path / "counts.csv.gz"
+    sample_counts.to_csv(str(csv_file), compress=True)
+
+    # gzip形式で保存され、読み込んだ結果が元のデータと一致することを確認
+    assert csv_file.read_bytes()[:2] == b"\x1f\x8b"
+    assert ReactionCounts.from_csv(str(csv_file)) == sample_counts
+
+
+def test_from_articles() -> None:
+    """記事のリストからの集計をテスト"""
+    articles = [
+        QiitaArticle.model_construct(id="1", likes_count=10, stocks_count=5),
+        QiitaArticle.model_construct(id="2", likes_count=20, stocks_count=10),
+        QiitaArticle.model_construct(id="3", likes_count=10, stocks_count=5),
+    ]
+
+    counts = ReactionCounts.from_articles(articles)
+
+    assert counts.likes == {10: 2, 20: 1}
+    assert counts.stocks == {5: 2, 10: 1}
+    assert counts.reactions == {15: 2, 30: 1}
+
+
+def test_compressed_csv_requires_gz_suffix(
+    sample_counts: ReactionCounts, tmp_path: Path
+) -> None:
+    """圧縮の指定とファイル名の拡張子の対応をテスト"""
+    # .gzで終わらないファイル名で圧縮を指定した場合はエラーになる
+    with pytest.raises(ValueError):
+        sample_counts.to_csv(str(tmp_path / "counts.csv"), compress=True)
+
+    # .gzで終わるファイル名の場合は指定しなくても圧縮され、読み込めることを確認
+    csv_file = tmp_path / "counts.csv.gz"
+    sample_counts.to_csv(str(csv_file))
+    assert csv_file.read_bytes()[:2] == b"\x1f\x8b"
+    assert ReactionCounts.from_csv(str(csv_file)) == sample_counts